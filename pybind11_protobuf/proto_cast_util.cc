@@ -5,6 +5,8 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/pytypes.h>
 
+#include <climits>
+#include <cstdint>
 #include <initializer_list>
 #include <iostream>
 #include <memory>
@@ -169,6 +171,28 @@ class GlobalState {
   const PyProto_API* py_proto_api() { return py_proto_api_; }
   bool using_fast_cpp() const { return using_fast_cpp_; }
 
+  // Returns true when src is an instance of a generated message class, based
+  // on the metaclass shared by all generated message classes. Returns false
+  // when the metaclass could not be resolved.
+  bool IsMessageInstance(py::handle src) const;
+
+  // Returns false when src is known not to be a fast cpp proto. This avoids
+  // PyProto_API calls which raise (and require clearing) a TypeError.
+  bool MaybeFastCppProto(py::handle src) const {
+    return !py_proto_api_ || !message_meta_ || IsMessageInstance(src);
+  }
+
+  // Returns DESCRIPTOR.full_name of a generated message instance, cached per
+  // message class. Returns nullptr for other objects, which may be
+  // duck-typed and so must be inspected on every call. The returned pointer
+  // is invalidated by the next call.
+  const std::string* CachedFullName(py::handle src);
+
+  // Returns the C++ prototype previously recorded for the class of src by
+  // SetCachedPrototype, or nullptr.
+  const Message* CachedPrototype(py::handle src);
+  void SetCachedPrototype(py::handle src, const Message* prototype);
+
   // Allocate a python proto message instance using the native python
   // allocations.
   py::object PyMessageInstance(const Descriptor* descriptor);
@@ -187,6 +211,7 @@ class GlobalState {
 
   const PyProto_API* py_proto_api_ = nullptr;
   bool using_fast_cpp_ = false;
+  py::object message_meta_;
   py::object global_pool_;
   py::object factory_;
   py::object find_message_type_by_name_;
@@ -194,6 +219,18 @@ class GlobalState {
   py::object get_message_class_;
 
   absl::flat_hash_map<std::string, py::module_> import_cache_;
+
+  struct CachedClassInfo {
+    std::string full_name;
+    // Prototype from the C++ pool wrapping the class's python pool. That pool
+    // is owned by PythonDescriptorPoolWrapper, which never deletes it, so the
+    // pointer stays valid for as long as the entry (i.e. the class) exists.
+    const Message* prototype = nullptr;
+  };
+  CachedClassInfo* CachedClass(py::handle src);
+  // Keyed by message class. Entries are erased by a weakref callback while
+  // the class is being destroyed, so a key is never reused while cached.
+  absl::flat_hash_map<PyObject*, CachedClassInfo> class_cache_;
 };
 
 GlobalState::GlobalState() {
@@ -286,6 +323,74 @@ GlobalState::GlobalState() {
     }
   }
 #endif
+
+  // All generated message classes share a single metaclass; resolve it from
+  // a well-known message class.
+  try {
+    auto cls = ResolveAttrs(ImportCached("google.protobuf.descriptor_pb2"),
+                            {"FileDescriptorProto"});
+    if (cls) {
+      message_meta_ = py::reinterpret_borrow<py::object>(
+          reinterpret_cast<PyObject*>(Py_TYPE(cls->ptr())));
+    }
+  } catch (py::error_already_set& e) {
+    // This prints and clears the error. Without the metaclass, every object
+    // takes the generic paths.
+    e.restore();
+    PyErr_Print();
+  }
+}
+
+bool GlobalState::IsMessageInstance(py::handle src) const {
+  if (!message_meta_) return false;
+  auto* meta = Py_TYPE(reinterpret_cast<PyObject*>(Py_TYPE(src.ptr())));
+  auto* expected = reinterpret_cast<PyTypeObject*>(message_meta_.ptr());
+  // Compare the metaclass pointer directly; only fall back to walking the MRO
+  // for classes with a derived metaclass.
+  return meta == expected || PyType_IsSubtype(meta, expected);
+}
+
+GlobalState::CachedClassInfo* GlobalState::CachedClass(py::handle src) {
+  if (!IsMessageInstance(src)) return nullptr;
+  auto* cls = reinterpret_cast<PyObject*>(Py_TYPE(src.ptr()));
+  auto cached = class_cache_.find(cls);
+  if (cached == class_cache_.end()) {
+    auto py_full_name = ResolveAttrs(cls, {"DESCRIPTOR", "full_name"});
+    if (!py_full_name) return nullptr;
+    auto full_name = CastToOptionalString(*py_full_name);
+    if (!full_name) return nullptr;
+    // Drop the entry when the class is destroyed, rather than keeping it (and
+    // its descriptor pool) alive. Same pattern as
+    // pybind11::detail::keep_alive_impl: the callback owns the weakref.
+    py::cpp_function on_destroy([cls](py::handle weakref) {
+      GlobalState::instance()->class_cache_.erase(cls);
+      weakref.dec_ref();
+    });
+    if (!PyWeakref_NewRef(cls, on_destroy.ptr())) {
+      PyErr_Clear();
+      return nullptr;
+    }
+    cached = class_cache_.emplace(cls, CachedClassInfo{*std::move(full_name)})
+                 .first;
+  }
+  return &cached->second;
+}
+
+const std::string* GlobalState::CachedFullName(py::handle src) {
+  CachedClassInfo* cached = CachedClass(src);
+  return cached ? &cached->full_name : nullptr;
+}
+
+const Message* GlobalState::CachedPrototype(py::handle src) {
+  CachedClassInfo* cached = CachedClass(src);
+  return cached ? cached->prototype : nullptr;
+}
+
+void GlobalState::SetCachedPrototype(py::handle src,
+                                     const Message* prototype) {
+  if (CachedClassInfo* cached = CachedClass(src)) {
+    cached->prototype = prototype;
+  }
 }
 
 py::module_ GlobalState::ImportCached(const std::string& module_name) {
@@ -592,6 +697,7 @@ const Message* PyProtoGetCppMessagePointer(py::handle src) {
   // message pointer.
   assert(PyGILState_Check());
   if (!GlobalState::instance()->py_proto_api()) return nullptr;
+  if (!GlobalState::instance()->MaybeFastCppProto(src)) return nullptr;
   auto* ptr =
       GlobalState::instance()->py_proto_api()->GetMessagePointer(src.ptr());
   if (ptr == nullptr) {
@@ -605,6 +711,10 @@ const Message* PyProtoGetCppMessagePointer(py::handle src) {
 
 absl::optional<std::string> PyProtoDescriptorFullName(py::handle py_proto) {
   assert(PyGILState_Check());
+  if (const std::string* full_name =
+          GlobalState::instance()->CachedFullName(py_proto)) {
+    return *full_name;
+  }
   auto py_full_name = ResolveAttrs(py_proto, {"DESCRIPTOR", "full_name"});
   if (py_full_name) {
     return CastToOptionalString(*py_full_name);
@@ -614,6 +724,10 @@ absl::optional<std::string> PyProtoDescriptorFullName(py::handle py_proto) {
 
 bool PyProtoHasMatchingFullName(py::handle py_proto,
                                 const Descriptor* descriptor) {
+  if (const std::string* full_name =
+          GlobalState::instance()->CachedFullName(py_proto)) {
+    return *full_name == descriptor->full_name();
+  }
   auto full_name = PyProtoDescriptorFullName(py_proto);
   return full_name && *full_name == descriptor->full_name();
 }
@@ -658,18 +772,33 @@ void CProtoCopyToPyProto(Message* message, py::handle py_proto) {
                          message->GetDescriptor()->full_name());
   }
 
-  auto serialized = message->SerializePartialAsString();
-#if PY_MAJOR_VERSION >= 3
-  auto view = py::memoryview::from_memory(serialized.data(), serialized.size());
-#else
-  py::bytearray view(serialized);
-#endif
-  (*merge_fn)(view);
+  // Serialize directly into the bytes object passed to MergeFromString,
+  // rather than into an intermediate std::string.
+  const size_t size = message->ByteSizeLong();
+  if (size > static_cast<size_t>(INT_MAX)) {
+    throw py::value_error("Cannot copy " +
+                          message->GetDescriptor()->full_name() +
+                          " to python: serialized size exceeds 2GiB");
+  }
+  auto serialized = py::reinterpret_steal<py::bytes>(
+      PyBytes_FromStringAndSize(nullptr, static_cast<Py_ssize_t>(size)));
+  if (!serialized) {
+    throw py::error_already_set();
+  }
+  message->SerializeWithCachedSizesToArray(
+      reinterpret_cast<uint8_t*>(PyBytes_AS_STRING(serialized.ptr())));
+  (*merge_fn)(serialized);
 }
 
 std::unique_ptr<Message> AllocateCProtoFromPythonSymbolDatabase(
     py::handle src, const std::string& full_name) {
   assert(PyGILState_Check());
+  // Generated message classes resolve to the same prototype on every call, so
+  // skip the pool and descriptor lookups once it is known.
+  if (const Message* prototype = GlobalState::instance()->CachedPrototype(src)) {
+    return std::unique_ptr<Message>(prototype->New());
+  }
+
   auto pool = ResolveAttrs(src, {"DESCRIPTOR", "file", "pool"});
   if (!pool) {
     throw py::type_error(py::repr(src).cast<std::string>() +
@@ -690,6 +819,7 @@ std::unique_ptr<Message> AllocateCProtoFromPythonSymbolDatabase(
   if (!prototype) {
     throw py::type_error("Unable to get prototype for " + full_name);
   }
+  GlobalState::instance()->SetCachedPrototype(src, prototype);
   return std::unique_ptr<Message>(prototype->New());
 }
 
@@ -54,7 +54,9 @@ struct proto_caster_load_impl {
     // from the object.
     const ::google::protobuf::Message *message =
         pybind11_protobuf::PyProtoGetCppMessagePointer(src);
-    if (message) {
+    // Messages of another type are rejected by a descriptor pointer compare,
+    // which is cheaper than a failing dynamic_cast.
+    if (message && message->GetDescriptor() == ProtoType::GetDescriptor()) {
       value = dynamic_cast<const ProtoType *>(message);
       if (value) {
         // If the capability were available, then we could probe PyProto_API and
@@ -8,14 +8,18 @@
 #include <pybind11/functional.h>
 
 #include <cstddef>
+#include <cstring>
 #include <memory>
 #include <stdexcept>
 #include <string>
+#include <type_traits>
 
 #include "google/protobuf/descriptor.pb.h"
 #include "google/protobuf/descriptor.h"
 #include "google/protobuf/message.h"
 #include "google/protobuf/reflection.h"
+#include "google/protobuf/repeated_field.h"
+#include "absl/container/flat_hash_map.h"
 #include "absl/strings/string_view.h"
 
 namespace pybind11 {
@@ -165,6 +169,10 @@ class ProtoFieldContainerBase {
   // Add is only available for embedded message fields; abort for all others.
   void Add() { std::abort(); }
 
+  // Preallocates storage for `size` elements of a repeated field. This is
+  // only a hint, and is a no-op unless overridden by a specialization.
+  void Reserve(int /*size*/) {}
+
  protected:
   // Throws an exception if the index is bad, adjusting for negative indexes
   // (which are relative to the end of the list). Returns the adjusted index.
@@ -230,12 +238,39 @@ class ProtoFieldContainerBase {
 // void Append(handle value): Converts and adds the value to a repeated field.
 // std::string ElementRepr(int idx) const: Convert the element to a string.
 //
+// Numeric specializations additionally implement:
+// RepeatedField<cpp_type>* MutableRepeatedField(): Returns the contiguous
+//   storage backing a repeated field.
+//
 // Note: cpp_type may not be exactly the same as the template argument type-
 // it could be a reference or a pointer to that type. Use ProtoFieldAccess<T>
 // To get the exact type that is returned by the Get() method.
 template <typename T>
 class ProtoFieldContainer {};
 
+// Returns the contiguous storage backing the repeated numeric field
+// `field_desc` of `proto`. Reflection::MutableRepeatedField is deprecated in
+// favour of GetMutableRepeatedFieldRef, but the latter does not expose the
+// underlying RepeatedField, which ExtendFromBuffer copies into in one go.
+template <typename T>
+::google::protobuf::RepeatedField<T>* MutableNumericRepeatedField(
+    const ::google::protobuf::Reflection* reflection, ::google::protobuf::Message* proto,
+    const ::google::protobuf::FieldDescriptor* field_desc) {
+#if defined(__GNUC__)
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wdeprecated-declarations"
+#elif defined(_MSC_VER)
+#pragma warning(push)
+#pragma warning(disable : 4996)
+#endif
+  return reflection->MutableRepeatedField<T>(proto, field_desc);
+#if defined(__GNUC__)
+#pragma GCC diagnostic pop
+#elif defined(_MSC_VER)
+#pragma warning(pop)
+#endif
+}
+
 // Create specializations of that template class for each numeric type.
 // Unfortunately the type name is in the function names used to access the
 // field, so the only way to do this is with a macro.
@@ -271,6 +306,11 @@ class ProtoFieldContainer {};
     std::string ElementRepr(int idx) const {                             \
       return std::to_string(Get(idx));                                   \
     }                                                                    \
+    auto* MutableRepeatedField() {                                       \
+      return MutableNumericRepeatedField<cpp_type>(reflection_, proto_,  \
+                                                   field_desc_);         \
+    }                                                                    \
+    void Reserve(int size) { MutableRepeatedField()->Reserve(size); }    \
   }
 
 NUMERIC_FIELD_REFLECTION_SPECIALIZATION(Int32, int32_t);
@@ -362,9 +402,14 @@ class ProtoFieldContainer<::google::protobuf::Message> : public ProtoFieldContai
   }
   void Append(handle value) {
     CheckValueType(value);
-    reflection_->AddAllocatedMessage(
-        proto_, field_desc_,
-        PyProtoAllocateAndCopyMessage<::google::protobuf::Message>(value).release());
+    // Copy directly into the new element rather than into a temporary.
+    ::google::protobuf::Message* message = reflection_->AddMessage(proto_, field_desc_);
+    try {
+      ProtoCopyFrom(message, value);
+    } catch (...) {
+      reflection_->RemoveLast(proto_, field_desc_);
+      throw;
+    }
   }
   ::google::protobuf::Message* Add(kwargs kwargs_in = kwargs()) {
     // Use a unique_ptr because it will automatically free memory if
@@ -431,9 +476,11 @@ class RepeatedFieldContainer : public ProtoFieldContainer<T> {
     return this->CastAndKeepAlive(this, return_value_policy::copy);
   }
   void Extend(handle src) {
+    if (ExtendFromBuffer(src)) return;
     if (!isinstance<sequence>(src))
       throw std::invalid_argument("Extend: Passed value is not a sequence.");
     auto values = reinterpret_borrow<sequence>(src);
+    this->Reserve(this->Size() + static_cast<int>(len(values)));
     for (auto value : values) this->Append(value);
   }
   void Insert(int idx, handle value) {
@@ -498,6 +545,35 @@ class RepeatedFieldContainer : public ProtoFieldContainer<T> {
   }
 
  protected:
+  // Appends the contents of `src` with a single memcpy when it exposes a
+  // contiguous one-dimensional buffer of T (numpy arrays, array.array, etc.).
+  // Returns false if the slow, per-element path must be used instead.
+  bool ExtendFromBuffer(handle src) {
+    if constexpr (!std::is_arithmetic<T>::value) {
+      return false;
+    } else {
+      if (!PyObject_CheckBuffer(src.ptr())) return false;
+      // Same request as buffer::request(), but an exporter which rejects it
+      // is not an error: its items can still be read as a sequence.
+      auto* view = new Py_buffer();
+      if (PyObject_GetBuffer(src.ptr(), view, PyBUF_STRIDES | PyBUF_FORMAT)) {
+        delete view;
+        PyErr_Clear();
+        return false;
+      }
+      buffer_info info(view);
+      if (info.ndim != 1 || info.strides[0] != info.itemsize ||
+          !detail::compare_buffer_info<T>::compare(info)) {
+        return false;
+      }
+      auto* field = this->MutableRepeatedField();
+      int size = field->size();
+      field->Resize(size + static_cast<int>(info.size), T());
+      std::memcpy(field->mutable_data() + size, info.ptr,
+                  info.size * sizeof(T));
+      return true;
+    }
+  }
   void SwapElements(int i1, int i2) {
     this->reflection_->SwapElements(this->proto_, this->field_desc_, i1, i2);
   }
@@ -519,17 +595,60 @@ struct FindMapPair {
     // assume a random ordering of elements, in which case a O(n) search is
     // the best you can do.
     RepeatedFieldContainer<::google::protobuf::Message> map_field(proto, map_desc);
-    for (int i = 0; i < map_field.Size(); ++i) {
-      ::google::protobuf::Message* kv_pair = map_field.Get(i);
-      if (ProtoFieldContainer<KeyT>(kv_pair, key_desc).GetPython(-1).equal(key))
-        return kv_pair;
+    ::google::protobuf::Message* found = nullptr;
+    if (!FindStringKey(key_desc, map_field, key, &found)) {
+      for (int i = 0; i < map_field.Size(); ++i) {
+        ::google::protobuf::Message* kv_pair = map_field.Get(i);
+        if (ProtoFieldContainer<KeyT>(kv_pair, key_desc).GetPython(-1).equal(
+                key)) {
+          found = kv_pair;
+          break;
+        }
+      }
     }
+    if (found) return found;
     // Key not found
     if (!add_key) return nullptr;
     ::google::protobuf::Message* new_kv_pair = map_field.Add();
     ProtoFieldContainer<KeyT>(new_kv_pair, key_desc).SetPython(-1, key);
     return new_kv_pair;
   }
+
+ private:
+  // For string keys passed as a python str, compares the utf-8 encoding of
+  // the key against each element without creating a python object per
+  // element. Returns false when the generic comparison must be used instead.
+  static bool FindStringKey(
+      const ::google::protobuf::FieldDescriptor* key_desc,
+      const RepeatedFieldContainer<::google::protobuf::Message>& map_field,
+      handle key, ::google::protobuf::Message** found) {
+    if constexpr (std::is_same_v<KeyT, std::string>) {
+      if (key_desc->type() != ::google::protobuf::FieldDescriptor::TYPE_STRING ||
+          !PyUnicode_Check(key.ptr()))
+        return false;
+      Py_ssize_t size;
+      const char* data = PyUnicode_AsUTF8AndSize(key.ptr(), &size);
+      if (data == nullptr) {
+        // Not encodable as utf-8 (e.g. lone surrogates); let the generic path
+        // report it consistently.
+        PyErr_Clear();
+        return false;
+      }
+      absl::string_view key_view(data, static_cast<size_t>(size));
+      std::string scratch;
+      for (int i = 0; i < map_field.Size(); ++i) {
+        ::google::protobuf::Message* kv_pair = map_field.Get(i);
+        if (kv_pair->GetReflection()->GetStringReference(*kv_pair, key_desc,
+                                                         &scratch) == key_view) {
+          *found = kv_pair;
+          break;
+        }
+      }
+      return true;
+    } else {
+      return false;
+    }
+  }
 };
 
 // Struct which can be used with DispatchFieldDescriptor to get the value of
@@ -670,19 +789,118 @@ class MapFieldContainer : public RepeatedFieldContainer<::google::protobuf::Mess
   const ::google::protobuf::FieldDescriptor* value_desc_;
 };
 
+// Caches the field name -> FieldDescriptor mapping of each message type, so
+// that repeated attribute accesses skip the DescriptorPool lookup (and the
+// std::string allocation it requires). The mapping for a Descriptor is built
+// once, on first use, by walking all of its fields. Callers must hold the GIL.
+//
+// Only descriptors from the generated pool are cached, as that pool is never
+// destroyed. Descriptors from other pools may be freed (and their addresses
+// reused), so they are always looked up directly.
+//
+// Each field name is also interned as a python str, so that names passed
+// from python (identifiers and keyword arguments are interned by the
+// interpreter) resolve with a pointer comparison rather than a string hash.
+class FieldDescriptorCache {
+ public:
+  // The cache intentionally leaks at program termination, as the Descriptor
+  // keys may be destroyed before it.
+  static FieldDescriptorCache* instance() {
+    static auto instance = new FieldDescriptorCache();
+    return instance;
+  }
+
+  const ::google::protobuf::FieldDescriptor* FindFieldByName(
+      const ::google::protobuf::Descriptor* descriptor, absl::string_view name) {
+    if (!IsCacheable(descriptor))
+      return descriptor->FindFieldByName(std::string(name));
+    const Fields& fields = GetFields(descriptor);
+    auto it = fields.by_name.find(name);
+    return it == fields.by_name.end() ? nullptr : it->second;
+  }
+
+  // Returns the field for a python str name. Returns nullptr when the name is
+  // not a field, and throws if name is not a str.
+  const ::google::protobuf::FieldDescriptor* FindFieldByName(
+      const ::google::protobuf::Descriptor* descriptor, handle name) {
+    if (!IsCacheable(descriptor))
+      return FindFieldByName(descriptor, cast<absl::string_view>(name));
+    const Fields& fields = GetFields(descriptor);
+    auto it = fields.by_interned_name.find(name.ptr());
+    if (it != fields.by_interned_name.end()) return it->second;
+    // Every field name is interned above, and interned strings are unique per
+    // value, so an interned miss (the usual case for attribute names) cannot
+    // be a field; skip decoding it for the by_name lookup.
+    if (PyUnicode_Check(name.ptr()) && PyUnicode_CHECK_INTERNED(name.ptr()))
+      return nullptr;
+    return FindFieldByName(descriptor, cast<absl::string_view>(name));
+  }
+
+ private:
+  struct Fields {
+    absl::flat_hash_map<std::string, const ::google::protobuf::FieldDescriptor*>
+        by_name;
+    // Keys are interned python strings; the references are never released.
+    absl::flat_hash_map<PyObject*, const ::google::protobuf::FieldDescriptor*>
+        by_interned_name;
+  };
+
+  FieldDescriptorCache() = default;
+
+  static bool IsCacheable(const ::google::protobuf::Descriptor* descriptor) {
+    return descriptor->file()->pool() ==
+           ::google::protobuf::DescriptorPool::generated_pool();
+  }
+
+  const Fields& GetFields(const ::google::protobuf::Descriptor* descriptor) {
+    auto it = fields_by_descriptor_.find(descriptor);
+    if (it != fields_by_descriptor_.end()) return it->second;
+    Fields fields;
+    for (int i = 0; i < descriptor->field_count(); ++i) {
+      const ::google::protobuf::FieldDescriptor* field_desc = descriptor->field(i);
+      std::string field_name(field_desc->name());
+      PyObject* interned = PyUnicode_InternFromString(field_name.c_str());
+      if (!interned) throw error_already_set();
+      fields.by_interned_name.emplace(interned, field_desc);
+      fields.by_name.emplace(std::move(field_name), field_desc);
+    }
+    return fields_by_descriptor_.emplace(descriptor, std::move(fields))
+        .first->second;
+  }
+
+  absl::flat_hash_map<const ::google::protobuf::Descriptor*, Fields>
+      fields_by_descriptor_;
+};
+
+[[noreturn]] void RaiseNoSuchField(const ::google::protobuf::Descriptor* descriptor,
+                                   absl::string_view name,
+                                   PyObject* error_type) {
+  std::string error_str =
+      "'" + std::string(descriptor->full_name()) +
+      "' object has no attribute '";
+  error_str.append(std::string(name));
+  error_str.append("'");
+  PyErr_SetString(error_type, error_str.c_str());
+  throw error_already_set();
+}
+
 const ::google::protobuf::FieldDescriptor* GetFieldDescriptor(
     ::google::protobuf::Message* message, absl::string_view name,
     PyObject* error_type = PyExc_AttributeError) {
-  auto* field_desc =
-  message->GetDescriptor()->FindFieldByName(std::string(name));
+  auto* field_desc = FieldDescriptorCache::instance()->FindFieldByName(
+      message->GetDescriptor(), name);
+  if (!field_desc) RaiseNoSuchField(message->GetDescriptor(), name, error_type);
+  return field_desc;
+}
 
+const ::google::protobuf::FieldDescriptor* GetFieldDescriptor(
+    ::google::protobuf::Message* message, handle name,
+    PyObject* error_type = PyExc_AttributeError) {
+  auto* field_desc = FieldDescriptorCache::instance()->FindFieldByName(
+      message->GetDescriptor(), name);
   if (!field_desc) {
-    std::string error_str =
-        "'" + message->GetTypeName() + "' object has no attribute '";
-    error_str.append(std::string(name));
-    error_str.append("'");
-    PyErr_SetString(error_type, error_str.c_str());
-    throw error_already_set();
+    RaiseNoSuchField(message->GetDescriptor(), cast<absl::string_view>(name),
+                     error_type);
   }
   return field_desc;
 }
@@ -763,20 +981,28 @@ std::string PyProtoSerializeToString(handle py_proto) {
 }
 
 const ::google::protobuf::Descriptor* PyProtoGetDescriptor(handle py_proto) {
-  detail::make_caster<::google::protobuf::Message> caster;
-  if (caster.load(py_proto, true)) {
-    // Native C++ proto, so we can get the descriptor directly.
-    return detail::cast_op<::google::protobuf::Message*>(caster)->GetDescriptor();
-  }
-
-  // Look the descriptor based on the proto's type name.
+  // Look the descriptor based on the proto's type name. Exact str and bytes
+  // names are checked first, so they skip the message caster, which can
+  // never load them.
   std::string full_type_name;
-  if (isinstance<bytes>(py_proto)) {
-    full_type_name = py_proto.cast<std::string>();
-  } else if (isinstance<str>(py_proto)) {
+  if (PyUnicode_CheckExact(py_proto.ptr())) {
     full_type_name = str(py_proto);
-  } else if (!PyProtoFullName(py_proto, &full_type_name)) {
-    throw std::invalid_argument("Could not get the name of the proto.");
+  } else if (PyBytes_CheckExact(py_proto.ptr())) {
+    full_type_name = py_proto.cast<std::string>();
+  } else {
+    detail::make_caster<::google::protobuf::Message> caster;
+    if (caster.load(py_proto, true)) {
+      // Native C++ proto, so we can get the descriptor directly.
+      return detail::cast_op<::google::protobuf::Message*>(caster)
+          ->GetDescriptor();
+    }
+    if (isinstance<bytes>(py_proto)) {
+      full_type_name = py_proto.cast<std::string>();
+    } else if (isinstance<str>(py_proto)) {
+      full_type_name = str(py_proto);
+    } else if (!PyProtoFullName(py_proto, &full_type_name)) {
+      throw std::invalid_argument("Could not get the name of the proto.");
+    }
   }
   const ::google::protobuf::Descriptor* descriptor =
       ::google::protobuf::DescriptorPool::generated_pool()->FindMessageTypeByName(
@@ -839,7 +1065,7 @@ void ProtoInitFields(::google::protobuf::Message* message, kwargs kwargs_in) {
 
   for (auto& item : kwargs_in) {
     DispatchFieldDescriptor<TemplatedProtoSetField>(
-        GetFieldDescriptor(message, cast<absl::string_view>(item.first)),
+        GetFieldDescriptor(message, item.first),
         message, item.second);
   }
 }
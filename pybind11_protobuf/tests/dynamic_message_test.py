@@ -8,6 +8,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
+
 from absl.testing import absltest
 from absl.testing import parameterized
 
@@ -18,40 +20,57 @@ from pybind11_protobuf.tests import compare
 from pybind11_protobuf.tests import dynamic_message_module as m
 from pybind11_protobuf.tests import test_pb2
 
-POOL = descriptor_pool.DescriptorPool()
-FACTORY = message_factory.MessageFactory(POOL)
-POOL.Add(
-    descriptor_pb2.FileDescriptorProto(
-        name='pybind11_protobuf/tests',
-        package='pybind11.test',
-        message_type=[
-            descriptor_pb2.DescriptorProto(
-                name='DynamicMessage',
-                field=[
-                    descriptor_pb2.FieldDescriptorProto(
-                        name='value', number=1, type=5)
-                ]),
-            descriptor_pb2.DescriptorProto(
-                name='IntMessage',
-                field=[
-                    descriptor_pb2.FieldDescriptorProto(
-                        name='value', number=1, type=5)
-                ])
-        ]))
+def make_int_message_file(package='pybind11.test',
+                          field_number=1,
+                          message_names=('IntMessage',)):
+  """Returns a file of messages with a single int32 field named value."""
+  return descriptor_pb2.FileDescriptorProto(
+      name='pybind11_protobuf/tests',
+      package=package,
+      message_type=[
+          descriptor_pb2.DescriptorProto(
+              name=name,
+              field=[
+                  descriptor_pb2.FieldDescriptorProto(
+                      name='value', number=field_number, type=5)
+              ]) for name in message_names
+      ])
+
+
+def make_int_message_class(package='pybind11.test', field_number=1):
+  """Returns the class of <package>.IntMessage, built in a new pool."""
+  pool = descriptor_pool.DescriptorPool()
+  pool.Add(make_int_message_file(package, field_number))
+  return message_factory.MessageFactory(pool).GetPrototype(
+      pool.FindMessageTypeByName(package + '.IntMessage'))
+
+
+@functools.lru_cache(maxsize=None)
+def get_factory():
+  """Returns a MessageFactory for a pool holding the dynamic test messages.
+
+  The pool is built on first use rather than at import time.
+  """
+  pool = descriptor_pool.DescriptorPool()
+  pool.Add(
+      make_int_message_file(message_names=('DynamicMessage', 'IntMessage')))
+  return message_factory.MessageFactory(pool)
 
 
 def get_py_dynamic_message(value=5):
   """Returns a dynamic message that is wire-compatible with IntMessage."""
-  prototype = FACTORY.CreatePrototype(
-      POOL.FindMessageTypeByName('pybind11.test.DynamicMessage'))
+  factory = get_factory()
+  prototype = factory.CreatePrototype(
+      factory.pool.FindMessageTypeByName('pybind11.test.DynamicMessage'))
   msg = prototype(value=value)
   return msg
 
 
 def get_py_dynamic_int_message(value=5):
   """Returns a dynamic message named pybind11.test.IntMessage."""
-  prototype = FACTORY.CreatePrototype(
-      POOL.FindMessageTypeByName('pybind11.test.IntMessage'))
+  factory = get_factory()
+  prototype = factory.CreatePrototype(
+      factory.pool.FindMessageTypeByName('pybind11.test.IntMessage'))
   msg = prototype(value=value)
   return msg
 
@@ -98,6 +117,14 @@ class DynamicMessageTest(parameterized.TestCase, compare.ProtoAssertions):
     self.assertTrue(m.check_message(message, 5))
     self.assertTrue(m.check_message_const_ptr(message, 5))
 
+  def test_check_message_from_new_pools(self):
+    # Each class gets its own C++ prototype, which is reused on later calls;
+    # classes with the same full name from other pools must not share it.
+    for number in (1, 2, 3):
+      prototype = make_int_message_class(field_number=number)
+      for value in (5, 6):
+        self.assertTrue(m.check_message(prototype(value=value), value))
+
   @parameterized.named_parameters(
       ('native_proto', test_pb2.IntMessage),
       ('py_dynamic_int', get_py_dynamic_int_message),
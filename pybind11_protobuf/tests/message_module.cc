@@ -9,6 +9,7 @@
 #include <memory>
 #include <stdexcept>
 
+#include "google/protobuf/any.pb.h"
 #include "google/protobuf/message.h"
 #include "google/protobuf/text_format.h"
 #include "pybind11_protobuf/native_proto_caster.h"
@@ -72,6 +73,12 @@ nested {
       },
       py::arg("value") = 123);
 
+  m.def("make_any_message", [](const ::google::protobuf::Message& msg) {
+    ::google::protobuf::Any any;
+    any.PackFrom(msg);
+    return any;
+  });
+
   m.def(
       "make_nested_message",
       [](int value) -> TestMessage::Nested {
@@ -556,6 +556,19 @@ class MessageTest(parameterized.TestCase, compare.ProtoAssertions):
     self.assertTrue(any_proto.Unpack(message))
     self.assertEqual(message.value, 5)
 
+  @parameterized.named_parameters(
+      ('native_proto', test_pb2.IntMessage),
+      ('cast_proto', m.make_int_message),
+  )
+  def test_make_any_message(self, factory):
+    message = factory()
+    message.value = 5
+    any_proto = m.make_any_message(message)
+    self.assertIsInstance(any_proto, any_pb2.Any)
+    expected = any_pb2.Any()
+    expected.Pack(message)
+    self.assertProtoEqual(any_proto, expected)
+
 
 if __name__ == '__main__':
   absltest.main()
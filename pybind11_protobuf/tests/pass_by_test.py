@@ -7,11 +7,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import gc
+import weakref
+
 from absl.testing import absltest
 from absl.testing import parameterized
 
 from pybind11_protobuf.tests import pass_by_module as m
 from pybind11_protobuf.tests import test_pb2
+from google.protobuf import descriptor_pb2
 from google.protobuf import descriptor_pool
 from google.protobuf import message_factory
 
@@ -119,6 +123,32 @@ class PassByTest(parameterized.TestCase):
     message = prototype(value=9)
     self.assertTrue(check_method(message, 9))
 
+  def test_dynamic_message_class_is_not_retained(self):
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(
+        descriptor_pb2.FileDescriptorProto(
+            name='pybind11_protobuf/tests/pass_by_dynamic.proto',
+            package='pybind11.test.dynamic',
+            message_type=[
+                descriptor_pb2.DescriptorProto(
+                    name='IntMessage',
+                    field=[
+                        descriptor_pb2.FieldDescriptorProto(
+                            name='value', number=1, type=5)
+                    ])
+            ]))
+    factory = message_factory.MessageFactory(pool)
+    cls = factory.GetPrototype(
+        pool.FindMessageTypeByName('pybind11.test.dynamic.IntMessage'))
+    # The full name does not match, so the class is looked up (and cached)
+    # without ever loading its pool.
+    with self.assertRaises(TypeError):
+      m.concrete_cref(cls(value=1), 1)
+    cls_ref = weakref.ref(cls)
+    del cls, factory, pool
+    gc.collect()
+    self.assertIsNone(cls_ref())
+
   def test_pass_none(self):
     self.assertFalse(m.concrete_cptr(None, 1))
     self.assertFalse(m.abstract_cptr(None, 2))
@@ -0,0 +1,58 @@
+// Copyright (c) 2022 The Pybind Development Team. All rights reserved.
+//
+// All rights reserved. Use of this source code is governed by a
+// BSD-style license that can be found in the LICENSE file.
+
+#include <pybind11/pybind11.h>
+
+#include <memory>
+#include <stdexcept>
+
+#include "google/protobuf/descriptor.pb.h"
+#include "google/protobuf/descriptor.h"
+#include "google/protobuf/dynamic_message.h"
+#include "google/protobuf/message.h"
+#include "pybind11_protobuf/proto_utils.h"
+#include "pybind11_protobuf/tests/test.pb.h"
+
+namespace py = ::pybind11;
+
+namespace {
+
+using pybind11::test::TestMessage;
+
+PYBIND11_MODULE(proto_utils_module, m) {
+  // Messages are returned serialized, so that this module does not depend on
+  // any of the proto casters.
+  m.def("make_test_message", [](py::kwargs kwargs) {
+    TestMessage message;
+    py::google::ProtoInitFields(&message, kwargs);
+    return py::bytes(message.SerializeAsString());
+  });
+
+  // Same as make_test_message, for a message which is wire-compatible with
+  // IntMessage and comes from a DescriptorPool that is destroyed on return.
+  m.def("make_dynamic_int_message", [](py::kwargs kwargs) {
+    ::google::protobuf::FileDescriptorProto file_proto;
+    file_proto.set_name("pybind11_protobuf/tests/proto_utils_dynamic.proto");
+    file_proto.set_package("pybind11.test");
+    auto* message_proto = file_proto.add_message_type();
+    message_proto->set_name("DynamicIntMessage");
+    auto* field_proto = message_proto->add_field();
+    field_proto->set_name("value");
+    field_proto->set_number(1);
+    field_proto->set_type(::google::protobuf::FieldDescriptorProto::TYPE_INT32);
+    field_proto->set_label(::google::protobuf::FieldDescriptorProto::LABEL_OPTIONAL);
+
+    ::google::protobuf::DescriptorPool pool;
+    const ::google::protobuf::FileDescriptor* file = pool.BuildFile(file_proto);
+    if (!file) throw std::runtime_error("Failed to build the dynamic pool.");
+    ::google::protobuf::DynamicMessageFactory factory(&pool);
+    std::unique_ptr<::google::protobuf::Message> message(
+        factory.GetPrototype(file->message_type(0))->New());
+    py::google::ProtoInitFields(message.get(), kwargs);
+    return py::bytes(message->SerializeAsString());
+  });
+}
+
+}  // namespace
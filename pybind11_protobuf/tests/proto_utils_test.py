@@ -0,0 +1,98 @@
+# Copyright (c) 2022 The Pybind Development Team. All rights reserved.
+#
+# All rights reserved. Use of this source code is governed by a
+# BSD-style license that can be found in the LICENSE file.
+"""Tests for proto_utils."""
+
+import array
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+from pybind11_protobuf.tests import proto_utils_module as m
+from pybind11_protobuf.tests import test_pb2
+
+
+def make_test_message(**kwargs):
+  return test_pb2.TestMessage.FromString(m.make_test_message(**kwargs))
+
+
+class ProtoUtilsTest(parameterized.TestCase):
+
+  def test_init_scalar_fields(self):
+    message = make_test_message(int_value=5, string_value='test')
+    self.assertEqual(message.int_value, 5)
+    self.assertEqual(message.string_value, 'test')
+
+  def test_init_unknown_field(self):
+    with self.assertRaisesRegex(
+        AttributeError,
+        "'pybind11.test.TestMessage' object has no attribute 'not_a_field'"):
+      make_test_message(not_a_field=5)
+
+  def test_init_dynamic_message(self):
+    # Each call builds (and destroys) a new DescriptorPool, so the fields of
+    # one call must not be looked up through descriptors of a previous one.
+    for value in range(5):
+      message = test_pb2.IntMessage.FromString(
+          m.make_dynamic_int_message(value=value))
+      self.assertEqual(message.value, value)
+
+  def test_init_dynamic_message_unknown_field(self):
+    with self.assertRaisesRegex(
+        AttributeError,
+        "'pybind11.test.DynamicIntMessage' object has no attribute 'x'"):
+      m.make_dynamic_int_message(x=5)
+
+  def test_init_repeated_int_message(self):
+    message = make_test_message(repeated_int_message=[
+        test_pb2.IntMessage(value=1),
+        test_pb2.IntMessage(value=2)
+    ])
+    self.assertEqual(
+        [element.value for element in message.repeated_int_message], [1, 2])
+
+  def test_init_repeated_int_message_wrong_type(self):
+    with self.assertRaises(TypeError):
+      make_test_message(
+          repeated_int_message=[test_pb2.IntMessage(value=1),
+                                test_pb2.TestMessage()])
+
+  def test_init_string_int_map(self):
+    message = make_test_message(string_int_map={'k1': 1, 'k2': 2})
+    self.assertEqual(dict(message.string_int_map), {'k1': 1, 'k2': 2})
+
+  def test_init_string_int_map_bytes_and_str_key(self):
+    # Both keys name the same map entry, so the second value replaces the
+    # first rather than adding a duplicate entry.
+    serialized = m.make_test_message(string_int_map={b'k': 1, 'k': 2})
+    self.assertEqual(
+        serialized,
+        test_pb2.TestMessage(string_int_map={'k': 2}).SerializeToString())
+
+  def test_init_string_int_map_surrogate_key(self):
+    # Not encodable as utf-8: falls back to the generic lookup, which fails to
+    # convert the key.
+    with self.assertRaises(TypeError):
+      m.make_test_message(string_int_map={'\ud800': 1})
+
+  @parameterized.named_parameters(
+      ('list', [1, 2, 3]),
+      ('matching_buffer', array.array('i', [1, 2, 3])),
+      ('other_buffer', array.array('q', [1, 2, 3])),
+  )
+  def test_init_repeated_int_value(self, values):
+    message = make_test_message(repeated_int_value=values)
+    self.assertEqual(list(message.repeated_int_value), [1, 2, 3])
+
+  def test_init_repeated_int_value_from_empty_buffer(self):
+    message = make_test_message(repeated_int_value=array.array('i'))
+    self.assertEmpty(message.repeated_int_value)
+
+  def test_init_repeated_int_value_from_float_buffer(self):
+    with self.assertRaises(TypeError):
+      make_test_message(repeated_int_value=array.array('d', [1.5]))
+
+
+if __name__ == '__main__':
+  absltest.main()